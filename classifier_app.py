@@ -1,18 +1,26 @@
 import numpy as np
 import tflite_runtime.interpreter as tflite
 import time
-from picamera2 import Picamera2
+import ctypes
+import os
+import queue
+import threading
+from picamera2 import Picamera2, MappedArray
 from libcamera import controls
-from gpiozero import Servo
-from gpiozero.pins.pigpio import PiGPIOFactory
-import math
+import pigpio
 
 # --- INITIAL SETUP ---
-factory = PiGPIOFactory()
+# Talk to pigpio directly: gpiozero's Servo.value property goes through a
+# Python wrapper chain with bounds checks on every write, which adds up at
+# 201 writes per sweep on a 5 ms cadence.
+pi = pigpio.pi()
+if not pi.connected:
+    print("Error: pigpio daemon not running. Start it with 'sudo pigpiod'.")
+    exit()
 
-# Define tilt and pan servos on specified GPIO pins
-servo_tilt = Servo(17, pin_factory=factory, min_pulse_width=0.5/1000, max_pulse_width=2.5/1000)
-servo_pan = Servo(27, pin_factory=factory, min_pulse_width=0.5/1000, max_pulse_width=2.5/1000)
+# Tilt and pan servos on specified GPIO pins
+TILT_PIN = 17
+PAN_PIN = 27
 
 # --- ANGLE CONSTANTS ---
 CENTER_POS = 90
@@ -22,54 +30,155 @@ DRY_POS = 135
 # --- CONFIGURATION ---
 MODEL_PATH = 'model.tflite'
 LABEL_PATH = 'labels.txt'
+NUM_THREADS = 4  # one per Pi performance core
+CONFIDENCE_EARLY_EXIT = 0.9  # dominant-class threshold; skips the full scan
+XNNPACK_DELEGATE_LIB = 'libtensorflow_lite_xnnpack_delegate.so'
+
+# Reciprocal-multiply form of /255: a single NEON multiply per element
+# wherever float scaling is needed.
+NORM_SCALE = np.float32(1.0 / 255.0)
+
+# 256-entry uint8 -> float32 lookup table: turns the per-pixel cast+divide
+# into a single gather with no FP division at all.
+NORM_LUT = np.arange(256, dtype=np.float32) * NORM_SCALE
+
+# Optional hand-written NEON kernel (see normalize_neon.c): fuses the cast
+# and scale in one 16-lane SIMD pass straight into the TFLite input buffer.
+NORMALIZE_LIB = './libnormalize.so'
+try:
+    _normalize_lib = ctypes.CDLL(NORMALIZE_LIB)
+    _normalize_lib.normalize_u8_to_f32.argtypes = [ctypes.c_void_p,
+                                                   ctypes.c_void_p,
+                                                   ctypes.c_size_t]
+    _normalize_lib.normalize_u8_to_f32.restype = None
+    neon_normalize = _normalize_lib.normalize_u8_to_f32
+except OSError:
+    neon_normalize = None
 
 # --- SERVO HELPER FUNCTIONS ---
-def deg_to_val(deg):
-    return (deg / 90) - 1
-
-def sine_sweep(servo, start_deg, end_deg, steps=200, delay=0.005):
-    start_val = deg_to_val(start_deg)
-    end_val = deg_to_val(end_deg)
-    delta_val = end_val - start_val
-
-    for i in range(steps + 1):
-        t = i / steps
-        eased_val = math.sin(math.pi * (t - 0.5))
-        current_val = start_val + (delta_val * ((eased_val + 1) / 2))
-        servo.value = current_val
+def deg_to_pulsewidth(deg):
+    # 0-180 deg maps to the servos' 500-2500 us pulse range.
+    return 500 + (deg / 180) * 2000
+
+# The easing curve has the same shape for every sweep, so compute it once at
+# import instead of calling math.sin per step inside the 5 ms timing loop.
+SWEEP_STEPS = 200
+EASE = 0.5 * (np.sin(np.pi * (np.arange(SWEEP_STEPS + 1) / SWEEP_STEPS - 0.5)) + 1.0)
+
+def _trajectory(start_deg, end_deg):
+    start_pw = deg_to_pulsewidth(start_deg)
+    delta_pw = deg_to_pulsewidth(end_deg) - start_pw
+    # Pre-unboxed integer microseconds: the real-time loop is just one
+    # pigpio C call plus a sleep per step.
+    return np.rint(start_pw + delta_pw * EASE).astype(np.int32).tolist()
+
+# Every sweep the app performs uses endpoints from this fixed set, so the
+# full servo-value trajectory for each pair is specialized at import and the
+# real-time loop reduces to a plain table walk.
+SWEEP_PAIRS = [
+    (CENTER_POS, WET_POS), (WET_POS, CENTER_POS),
+    (CENTER_POS, DRY_POS), (DRY_POS, CENTER_POS),
+    (CENTER_POS, 0), (0, CENTER_POS),
+]
+TRAJECTORIES = {pair: _trajectory(*pair) for pair in SWEEP_PAIRS}
+
+def sine_sweep(pin, start_deg, end_deg, delay=0.005):
+    schedule = TRAJECTORIES.get((start_deg, end_deg))
+    if schedule is None:  # non-constant endpoints: build on the fly
+        schedule = _trajectory(start_deg, end_deg)
+    for pulsewidth in schedule:
+        pi.set_servo_pulsewidth(pin, pulsewidth)
         time.sleep(delay)
 
 def run_deposit_sequence(target_angle):
     print(f"1. Panning to target angle ({target_angle} deg)")
-    sine_sweep(servo_pan, CENTER_POS, target_angle)
-    
+    sine_sweep(PAN_PIN, CENTER_POS, target_angle)
+
     time.sleep(0.5)
-    
+
     print("2. Tilting to drop waste...")
-    sine_sweep(servo_tilt, CENTER_POS, 0)
+    sine_sweep(TILT_PIN, CENTER_POS, 0)
     time.sleep(1)
-    sine_sweep(servo_tilt, 0, CENTER_POS)
-    
+    sine_sweep(TILT_PIN, 0, CENTER_POS)
+
     print(f"3. Returning Pan to Center ({CENTER_POS} deg)")
-    sine_sweep(servo_pan, target_angle, CENTER_POS)
+    sine_sweep(PAN_PIN, target_angle, CENTER_POS)
     print("Deposit sequence complete.")
 
 # --- APPLICATION INITIALIZATION ---
 try:
     with open(LABEL_PATH, 'r') as f:
-        labels = [line.strip() for line in f.readlines()]
+        # Normalized to lowercase once here so the per-item dispatch in
+        # trigger_actuator needs no .lower() allocation.
+        labels = [line.strip().lower() for line in f.readlines()]
 except FileNotFoundError:
     print(f"Error: Label file not found at {LABEL_PATH}. Check your path.")
     exit()
 
-interpreter = tflite.Interpreter(model_path=MODEL_PATH)
+# XNNPACK gives NEON-optimized conv/GEMM kernels on the Pi; fall back to the
+# default reference kernels if the delegate library is not installed.
+try:
+    xnn_delegate = tflite.load_delegate(XNNPACK_DELEGATE_LIB)
+    delegates = [xnn_delegate]
+    print("XNNPACK delegate loaded.")
+except (ValueError, OSError):
+    print("XNNPACK delegate not available, using default TFLite kernels.")
+    delegates = []
+
+# Load the model into RAM ourselves and mlock it so the kernel cannot evict
+# the weights while the process idles at the prompt between items; without
+# this, the first invoke after a long pause can be ~2x slower than steady
+# state. model_buf stays referenced for the lifetime of the interpreter.
+with open(MODEL_PATH, 'rb') as f:
+    model_buf = f.read()
+try:
+    libc = ctypes.CDLL(None)
+    addr = ctypes.cast(ctypes.c_char_p(model_buf), ctypes.c_void_p)
+    libc.mlock(addr, ctypes.c_size_t(len(model_buf)))
+except (OSError, AttributeError):
+    pass  # best effort; RLIMIT_MEMLOCK may be too small to pin the model
+
+interpreter = tflite.Interpreter(model_content=model_buf,
+                                 experimental_delegates=delegates,
+                                 num_threads=NUM_THREADS)
 interpreter.allocate_tensors()
 input_details = interpreter.get_input_details()
-_, input_height, input_width, _ = input_details[0]['shape']
+output_details = interpreter.get_output_details()
+
+# All tensor metadata the hot path needs, resolved once into constants so
+# capture_and_classify never walks the detail dicts per frame.
+INPUT_INDEX = input_details[0]['index']
+OUTPUT_INDEX = output_details[0]['index']
+INPUT_SHAPE = tuple(int(d) for d in input_details[0]['shape'])
+_, input_height, input_width, _ = INPUT_SHAPE
+input_dtype = input_details[0]['dtype']
+output_dtype = output_details[0]['dtype']
+output_scale, output_zero_point = output_details[0]['quantization']
+
+# Zero-copy accessors into the interpreter's own buffers. Views taken from
+# the input side must be dropped again before invoke(), or TFLite refuses
+# to run.
+input_tensor = interpreter.tensor(INPUT_INDEX)
+output_tensor = interpreter.tensor(OUTPUT_INDEX)
 
 print("Initializing Pi Camera...")
 picam2 = Picamera2()
-config = picam2.create_still_configuration(main={"size": (input_width, input_height), "format": "RGB888"})
+
+# Pick the smallest sensor mode that still covers the model input so the ISP
+# downscales to model size in hardware instead of streaming a full-resolution
+# buffer that would be cropped and copied later.
+usable_modes = [m for m in picam2.sensor_modes
+                if m['size'][0] >= input_width and m['size'][1] >= input_height]
+raw_stream = None
+if usable_modes:
+    best_mode = min(usable_modes, key=lambda m: m['size'][0] * m['size'][1])
+    raw_stream = {"size": best_mode['size']}
+
+config = picam2.create_still_configuration(
+    main={"size": (input_width, input_height), "format": "RGB888"},
+    raw=raw_stream,
+    buffer_count=1)  # one capture buffer keeps CMA pressure minimal
+picam2.align_configuration(config)  # snap to ISP-preferred strides
 picam2.configure(config)
 picam2.start()
 picam2.set_controls({"AfMode": controls.AfModeEnum.Continuous})
@@ -77,46 +186,142 @@ time.sleep(2)
 print(f"Camera ready. Model input size: {input_width}x{input_height}.")
 
 # Initial servo position
-servo_tilt.value = deg_to_val(CENTER_POS)
-servo_pan.value = deg_to_val(CENTER_POS)
+pi.set_servo_pulsewidth(TILT_PIN, deg_to_pulsewidth(CENTER_POS))
+pi.set_servo_pulsewidth(PAN_PIN, deg_to_pulsewidth(CENTER_POS))
 
 # --- CLASSIFICATION CORE ---
 def capture_and_classify():
     print("\n--- Starting Classification Cycle ---")
     print("Capturing image...")
     
-    img_array = picam2.capture_array()
-    
-    input_data = np.array(img_array, dtype=np.float32)
-    input_data = input_data / 255.0
-    input_data = np.expand_dims(input_data, axis=0)
-    
-    interpreter.set_tensor(input_details[0]['index'], input_data)
+    # Map the camera's DMA buffer in place instead of copying it out with
+    # capture_array(), and preprocess straight out of the mmap into the
+    # interpreter's input buffer. in_view is the (H, W, 3) slice behind the
+    # batch axis, so no expand_dims is needed and nothing is allocated.
+    request = picam2.capture_request()
+    try:
+        with MappedArray(request, "main") as m:
+            in_view = input_tensor()[0]
+            if input_dtype == np.uint8:
+                # Full-integer model (see quantize_model.py): the frame is
+                # already uint8 RGB - one copy, no float pass.
+                np.copyto(in_view, m.array)
+            elif neon_normalize is not None and m.array.flags['C_CONTIGUOUS']:
+                # One fused SIMD pass from the mmap into the TFLite buffer.
+                neon_normalize(m.array.ctypes.data, in_view.ctypes.data,
+                               m.array.size)
+            else:
+                # Normalize via the precomputed LUT: one gather, no divides.
+                np.take(NORM_LUT, m.array, out=in_view)
+            del in_view  # release the buffer reference before invoke()
+    finally:
+        request.release()  # hand the buffer back to the camera pool
+
     interpreter.invoke()
-    output_data = interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
 
-    probabilities = output_data[0]
-    predicted_index = np.argmax(probabilities)
+    # Zero-copy view of the output vector; only scalars leave this function,
+    # so the view is released again on return.
+    probabilities = output_tensor()[0]
+    if output_dtype == np.uint8:
+        # Dequantize the tiny output vector back to real probabilities.
+        probabilities = output_scale * (probabilities.astype(np.float32)
+                                        - output_zero_point)
+    # Only a handful of classes: a plain Python scan over the unboxed list
+    # beats NumPy's argmax dispatch overhead at this size. Most frames have
+    # one dominant probability, so stop at the first class above the
+    # threshold and only fall back to the full max() scan when none is.
+    probs_list = probabilities.tolist()
+    for predicted_index, confidence in enumerate(probs_list):
+        if confidence > CONFIDENCE_EARLY_EXIT:
+            break
+    else:
+        confidence = max(probs_list)
+        predicted_index = probs_list.index(confidence)
     predicted_class = labels[predicted_index]
-    confidence = probabilities[predicted_index]
-    
+
     return predicted_class, confidence
 
+def classify_batch(frames):
+    """Classify several uint8 RGB frames with a single interpreter invoke.
+
+    Meant for continuous (conveyor) sorting, where per-invoke overhead and
+    delegate dispatch dominate: resizing the input tensor to the batch lets
+    XNNPACK amortize those costs and reuse weights across all frames. The
+    single-frame shape is restored afterwards so capture_and_classify keeps
+    working. Returns a list of (label, confidence) pairs.
+    """
+    batch = np.stack(frames)
+    interpreter.resize_tensor_input(INPUT_INDEX, batch.shape)
+    interpreter.allocate_tensors()
+
+    in_view = input_tensor()
+    if input_dtype == np.uint8:
+        np.copyto(in_view, batch)
+    else:
+        np.take(NORM_LUT, batch, out=in_view)
+    del in_view  # release the buffer reference before invoke()
+
+    interpreter.invoke()
+
+    outputs = output_tensor().copy()
+    if output_dtype == np.uint8:
+        outputs = output_scale * (outputs.astype(np.float32)
+                                  - output_zero_point)
+
+    # Restore the single-frame shape for the interactive path.
+    interpreter.resize_tensor_input(INPUT_INDEX, INPUT_SHAPE)
+    interpreter.allocate_tensors()
+
+    results = []
+    for row in outputs:
+        probs_list = row.tolist()
+        confidence = max(probs_list)
+        results.append((labels[probs_list.index(confidence)], confidence))
+    return results
+
+def _mixed_drop():
+    print("No pan required (Mixed Waste). Tilting to drop...")
+    sine_sweep(TILT_PIN, CENTER_POS, 0)
+    time.sleep(1)
+    sine_sweep(TILT_PIN, 0, CENTER_POS)
+
+def _unknown_class():
+    print("ERROR: Unknown classification result. Staying at center.")
+    time.sleep(0.5)
+
+# Label -> actuator dispatch built once: with the labels pre-lowercased at
+# load, routing an item is a single dict lookup instead of a string-compare
+# cascade with a fresh .lower() per call.
+ACTIONS = {
+    "wet": lambda: run_deposit_sequence(WET_POS),
+    "dry": lambda: run_deposit_sequence(DRY_POS),
+    "mixed": _mixed_drop,
+}
+
 def trigger_actuator(waste_type):
     print(f"\n**Action:** Directing waste to the **{waste_type.upper()}** bin.")
-    
-    if waste_type.lower() == "wet":
-        run_deposit_sequence(WET_POS)
-    elif waste_type.lower() == "dry":
-        run_deposit_sequence(DRY_POS)
-    elif waste_type.lower() == "mixed":
-        print("No pan required (Mixed Waste). Tilting to drop...")
-        sine_sweep(servo_tilt, CENTER_POS, 0)
-        time.sleep(1)
-        sine_sweep(servo_tilt, 0, CENTER_POS)
-    else:
-        print("ERROR: Unknown classification result. Staying at center.")
-        time.sleep(0.5)
+    ACTIONS.get(waste_type, _unknown_class)()
+
+# --- SERVO WORKER THREAD ---
+# Deposit sequences block for several seconds of sleeps. Running them on a
+# dedicated thread returns the main loop to the prompt (and the next capture)
+# as soon as classification finishes instead of idling the camera and model.
+servo_jobs = queue.Queue()
+
+def servo_worker():
+    try:
+        # Pin to one performance core to keep sweep timing jitter-free.
+        os.sched_setaffinity(0, {3})
+    except (AttributeError, OSError):
+        pass
+    while True:
+        waste_type = servo_jobs.get()
+        try:
+            trigger_actuator(waste_type)
+        finally:
+            servo_jobs.task_done()
+
+threading.Thread(target=servo_worker, daemon=True).start()
 
 # --- MAIN EXECUTION LOOP ---
 if __name__ == "__main__":
@@ -126,17 +331,20 @@ if __name__ == "__main__":
 
         while True:
             # === WAIT FOR ENTER KEY PRESS ===
-            input("\n[Awaiting input...] Press ENTER to continue sorting. ") 
+            input("\n[Awaiting input...] Press ENTER to continue sorting. ")
+
+            # Block only if the previous deposit sequence is still running.
+            servo_jobs.join()
 
             print("\n=============================================")
-            
+
             predicted_class, confidence = capture_and_classify()
-            
+
             print("\n--- CLASSIFICATION RESULT ---")
             print(f"Predicted Class: **{predicted_class}**")
             print(f"Confidence: {confidence:.2f}")
-            
-            trigger_actuator(predicted_class)
+
+            servo_jobs.put(predicted_class)
             
     except KeyboardInterrupt:
         print("\n[INFO] Program stopped by user (Ctrl+C).")
@@ -145,7 +353,9 @@ if __name__ == "__main__":
         print(f"An unexpected error occurred: {e}")
         
     finally:
+        servo_jobs.join()  # let any in-flight deposit sequence finish
         picam2.stop()
-        servo_tilt.detach()
-        servo_pan.detach()
+        pi.set_servo_pulsewidth(TILT_PIN, 0)  # pulsewidth 0 detaches
+        pi.set_servo_pulsewidth(PAN_PIN, 0)
+        pi.stop()
         print("\nCamera stopped and servos detached. System resources released. Exiting.")
\ No newline at end of file
